@@ -16,15 +16,27 @@
 import bpy
 import numpy as np
 import os
+import mmap
 import time
 import re
 import glob
+import functools
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from .grid_values import read_grid_values, skip_lines
 
 try:
     import openvdb
 except ImportError:
     openvdb = None
 
+# Last sequence of digits before the extension: file001.cub -> "001"
+SEQUENCE_RE = re.compile(r'(\d+)(?=(\.[^.]+)$)')
+
+# .vdb file metadata key recording the sources and settings it was converted with
+SETTINGS_KEY = "cube_importer_settings"
+
 class ImportGaussianCube(bpy.types.Operator):
     """Import Gaussian Cube File"""
     bl_idname = "import_scene.gaussian_cube"
@@ -57,52 +69,153 @@ class ImportGaussianCube(bpy.types.Operator):
         default=False,
     )
     
+    half_float: bpy.props.BoolProperty(
+        name="Half Float",
+        description="Save grids as 16-bit floats, halving the .vdb file size. Fog volume densities don't need more",
+        default=True,
+    )
+    
+    tolerance: bpy.props.FloatProperty(
+        name="Tolerance",
+        description="Voxels within this distance of zero are left out of the grid, keeping it sparse",
+        default=1e-6,
+        min=0.0,
+        precision=6,
+    )
+    
+    # Set by invoke(): only the file browser flow runs modal, direct calls (scripts) import in place
+    _from_ui = False
+    # Background job state, set by execute() when it goes modal
+    _timer = None
+    _executor = None
+    _cancel_event = None
+    
     def execute(self, context):
         if openvdb is None:
             self.report({'ERROR'}, "openvdb module not found. This addon requires a Blender build with OpenVDB support.")
             return {'CANCELLED'}
         
         if self.files:
-            # Multiple files selected (Standard loop)
+            # Multiple files selected
+            filepaths = [os.path.join(self.directory, file.name) for file in self.files]
+        else:
+            # Single file selected (but might be sequence starter)
+            filepaths = [self.filepath]
+        
+        if not self._from_ui or context.window is None:
+            # Scripts and command line expect the volumes to exist on return, import in place
+            options = (self.scale_factor, self.naming_mode, self.import_sequence, self.half_float, self.tolerance)
             success = False
-            for file in self.files:
-                filepath = os.path.join(self.directory, file.name)
+            for filepath in filepaths:
                 try:
-                    load_cube(filepath, context, self.scale_factor, self.naming_mode, self.import_sequence)
+                    load_cube(filepath, context, *options)
                     success = True
                 except Exception as e:
-                    self.report({'ERROR'}, f"Failed to import {file.name}: {str(e)}")
+                    self.report({'ERROR'}, f"Failed to import {os.path.basename(filepath)}: {str(e)}")
                     import traceback
                     traceback.print_exc()
             
             return {'FINISHED'} if success else {'CANCELLED'}
-        else:
-            # Single file selected (but might be sequence starter)
+        
+        # One job per output .vdb: frames of one sequence all write the same file
+        sources = {}
+        for filepath in filepaths:
+            to_process, output_vdb_name = find_sources(filepath, self.import_sequence)
+            sources.setdefault(output_vdb_name, (filepath, to_process))
+        
+        # Convert in the background one .vdb at a time (write_vdb parses in parallel already),
+        # modal() imports the results on the main thread
+        options = (self.scale_factor, self.naming_mode, self.half_float, self.tolerance)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._cancel_event = threading.Event()
+        self._jobs = [
+            (filepath, self._executor.submit(convert_sources, to_process, output_vdb_name, *options,
+                                             cancel_event=self._cancel_event))
+            for output_vdb_name, (filepath, to_process) in sources.items()
+        ]
+        self._success = False
+        
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.report({'WARNING'}, "Cube import cancelled")
+            self.cancel(context)
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        
+        # Import in selection order
+        while self._jobs and self._jobs[0][1].done():
+            filepath, future = self._jobs.pop(0)
             try:
-                load_cube(self.filepath, context, self.scale_factor, self.naming_mode, self.import_sequence)
-                return {'FINISHED'}
+                import_vdb(future.result())
+                self._success = True
             except Exception as e:
-                self.report({'ERROR'}, f"Failed to import Cube: {str(e)}")
+                self.report({'ERROR'}, f"Failed to import {os.path.basename(filepath)}: {str(e)}")
                 import traceback
                 traceback.print_exc()
-                return {'CANCELLED'}
+                
+        if self._jobs:
+            return {'PASS_THROUGH'}
+        
+        self.finish(context)
+        return {'FINISHED'} if self._success else {'CANCELLED'}
+
+    def finish(self, context):
+        if self._timer is None:
+            return
+        context.window_manager.event_timer_remove(self._timer)
+        self._timer = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def cancel(self, context):
+        # Also called by Blender when it aborts the modal handler (file load, window close)
+        # and when the file browser is dismissed, before execute() started any job
+        if self._cancel_event is not None:
+            # Running conversions stop between files and skip their openvdb.write
+            self._cancel_event.set()
+        self.finish(context)
 
     def invoke(self, context, event):
+        self._from_ui = True
         context.window_manager.fileselect_add(self)
         return {'RUNNING_MODAL'}
 
-def read_vdb_grids(filepath, scale=1.0, naming_mode='MO_INDICES', force_grid_name=None):
+@functools.lru_cache(maxsize=32)
+def linear_transform(v1, v2, v3, origin, scale):
+    """Scaled openvdb linear transform for the cube axes and origin, cached across files (e.g. sequences)"""
+    mat = np.array([[*v1, 0.0], [*v2, 0.0], [*v3, 0.0], [*origin, 1.0]])
+    mat[:, :3] *= scale
+    return openvdb.createLinearTransform(mat)
+
+@functools.lru_cache(maxsize=128)
+def sequence_pattern(prefix, suffix):
+    """Compiled regex matching prefix + digits + suffix"""
+    return re.compile(f"^{re.escape(prefix)}(\\d+){re.escape(suffix)}$")
+
+def read_vdb_grids(filepath, scale=1.0, naming_mode='MO_INDICES', force_grid_name=None, half_float=False,
+                   tolerance=0.0):
     print(f"Reading Cube data: {filepath}")
-    with open(filepath, 'r') as f:
+    with open(filepath, 'rb') as f:
+        # mmap refuses empty files, report them like any other truncated header
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("Empty file or bad format")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+    with mm:
         # 1. Tittle
-        header1 = f.readline().strip()
-        header2 = f.readline().strip()
+        header1 = mm.readline().decode(errors='replace').strip()
+        header2 = mm.readline().decode(errors='replace').strip()
         
         # 2. Atoms count + Origin
-        line = f.readline().split()
+        line = mm.readline().split()
         if not line: raise ValueError("Empty file or bad format")
         n_atoms = int(line[0])
-        origin = np.array([float(x) for x in line[1:4]])
+        origin = (float(line[1]), float(line[2]), float(line[3]))
         
         is_multi_mo = False
         if n_atoms < 0:
@@ -110,27 +223,26 @@ def read_vdb_grids(filepath, scale=1.0, naming_mode='MO_INDICES', force_grid_nam
             n_atoms = abs(n_atoms)
             
         # 3. Vectors
-        line = f.readline().split()
+        line = mm.readline().split()
         n1 = int(line[0])
-        v1 = np.array([float(x) for x in line[1:4]])
+        v1 = (float(line[1]), float(line[2]), float(line[3]))
         
-        line = f.readline().split()
+        line = mm.readline().split()
         n2 = int(line[0])
-        v2 = np.array([float(x) for x in line[1:4]])
+        v2 = (float(line[1]), float(line[2]), float(line[3]))
         
-        line = f.readline().split()
+        line = mm.readline().split()
         n3 = int(line[0])
-        v3 = np.array([float(x) for x in line[1:4]])
+        v3 = (float(line[1]), float(line[2]), float(line[3]))
         
         # 4. Atoms (Skip)
-        for _ in range(n_atoms):
-            f.readline()
+        skip_lines(mm, n_atoms)
             
         # 5. MO Header
         n_mo = 1
         mo_indices = []
         if is_multi_mo:
-            line = f.readline().split()
+            line = mm.readline().split()
             try:
                 n_mo = int(line[0])
             except ValueError:
@@ -139,46 +251,26 @@ def read_vdb_grids(filepath, scale=1.0, naming_mode='MO_INDICES', force_grid_nam
             current_indices = [int(x) for x in line[1:]] if len(line) > 1 else []
             if n_mo > 1:
                 while len(current_indices) < n_mo:
-                    line = f.readline().split()
+                    line = mm.readline().split()
                     current_indices.extend([int(x) for x in line])
                 mo_indices = current_indices[:n_mo]
             elif n_mo == 1 and current_indices:
                 mo_indices = current_indices[:1]
 
-        # 6. Grid Data
-        content = f.read()
+        # 6. Grid Data (parsed straight from the mapped bytes, no str copy)
+        expected_len = n1 * n2 * n3 * n_mo
+        data, n_values = read_grid_values(mm, mm.tell(), n1 * n2 * n3, n_mo)
         
-    data = np.fromstring(content, sep=' ')
-    expected_len = n1 * n2 * n3 * n_mo
-    
-    if data.size != expected_len:
-        print(f"Warning: Expected {expected_len} values, got {data.size}. Adjusting.")
-        if data.size > expected_len:
-            data = data[:expected_len]
-        else:
-             data = np.pad(data, (0, expected_len - data.size))
+    if n_values != expected_len:
+        print(f"Warning: Expected {expected_len} values, got {n_values}. Adjusting.")
     
-    if n_mo > 1:
-        data = data.reshape((n1, n2, n3, n_mo))
-    else:
-        data = data.reshape((n1, n2, n3))
-        
     grids = []
     
     # Transform
-    mat = np.identity(4)
-    mat[0, :3] = v1 * scale
-    mat[1, :3] = v2 * scale
-    mat[2, :3] = v3 * scale
-    mat[3, :3] = origin * scale
-    
-    transform = openvdb.createLinearTransform(mat)
+    transform = linear_transform(v1, v2, v3, origin, scale)
     
     for m in range(n_mo):
-        if n_mo > 1:
-            vol_data = data[:, :, :, m]
-        else:
-            vol_data = data
+        vol_data = data[m].reshape((n1, n2, n3))
 
         if force_grid_name is not None:
              if n_mo > 1:
@@ -196,16 +288,71 @@ def read_vdb_grids(filepath, scale=1.0, naming_mode='MO_INDICES', force_grid_nam
 
         grid = openvdb.FloatGrid()
         grid.name = grid_name
-        grid.copyFromArray(vol_data.astype(np.float32)) 
+        # Values within tolerance of the background (0) become inactive tiles, not voxels
+        grid.copyFromArray(vol_data, tolerance=tolerance)
         grid.transform = transform
         grid.gridClass = openvdb.GridClass.FOG_VOLUME
+        # Quantized on write only, the in-memory grid stays float32
+        grid.saveFloatAsHalf = half_float
         grids.append(grid)
         
     return grids
 
-def load_cube(filepath, context, scale=1.0, naming_mode='MO_INDICES', import_sequence=False):
-    start_time = time.time()
+def source_stamps(to_process):
+    """(path, grid name, mtime, size) per source file, mtime and size are None if it can't be stat'ed"""
+    stamps = []
+    for path, custom_name in to_process:
+        try:
+            st = os.stat(path)
+            stamps.append((path, custom_name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamps.append((path, custom_name, None, None))
+    return stamps
+
+def vdb_up_to_date(output_vdb_name, settings):
+    """True if output_vdb_name was written with exactly these settings (including source mtimes and sizes)"""
+    if not os.path.exists(output_vdb_name):
+        return False
+    try:
+        metadata = openvdb.readMetadata(output_vdb_name)
+    except (OSError, RuntimeError):
+        # openvdb raises IOError for unreadable files, RuntimeError for other library errors
+        return False
+    return metadata.get(SETTINGS_KEY) == settings
+
+def write_vdb(to_process, output_vdb_name, settings, scale=1.0, naming_mode='MO_INDICES', half_float=False,
+              tolerance=0.0, cancel_event=None):
+    all_grids = []
+    
+    # Parse files on worker threads so file I/O overlaps parsing, keep sequence order
+    with ThreadPoolExecutor(max_workers=min(4, len(to_process))) as executor:
+        futures = [
+            (path, executor.submit(read_vdb_grids, path, scale, naming_mode, custom_name, half_float, tolerance))
+            for path, custom_name in to_process
+        ]
+        for path, future in futures:
+            if cancel_event is not None and cancel_event.is_set():
+                # Drop the files not started yet, only wait for the ones being parsed
+                executor.shutdown(wait=False, cancel_futures=True)
+                break
+            try:
+                all_grids.extend(future.result())
+            except Exception as e:
+                print(f"Error reading {path}: {e}")
     
+    # Checked again after the last file, never write a .vdb for a cancelled import
+    if cancel_event is not None and cancel_event.is_set():
+        raise CancelledError(f"Conversion to {output_vdb_name} cancelled")
+            
+    if not all_grids:
+        raise RuntimeError("No grids loaded.")
+        
+    # openvdb.write compresses with the library default codec (blosc/zip)
+    print(f"Writing {len(all_grids)} grids to {output_vdb_name}")
+    openvdb.write(output_vdb_name, grids=all_grids, metadata={SETTINGS_KEY: settings})
+
+def find_sources(filepath, import_sequence=False):
+    """Cube files to convert for filepath (its whole sequence if asked) and the .vdb path they go to"""
     to_process = [] # list of (path, name_override)
     
     base_dir = os.path.dirname(filepath)
@@ -216,8 +363,7 @@ def load_cube(filepath, context, scale=1.0, naming_mode='MO_INDICES', import_seq
     if import_sequence:
         # Detect pattern: last sequence of digits
         # file001.cub -> pattern match "001"
-        match = re.search(r'(\d+)(?=(\.[^.]+)$)', filename) 
-        # (?=(\.[^.]+)$) looks for digits followed by extension
+        match = SEQUENCE_RE.search(filename)
         
         if match:
             digits = match.group(1)
@@ -227,10 +373,9 @@ def load_cube(filepath, context, scale=1.0, naming_mode='MO_INDICES', import_seq
             suffix = filename[match.end(1):]
             
             # Regex for matching other files
-            pattern_str = f"^{re.escape(prefix)}(\\d+){re.escape(suffix)}$"
-            pattern = re.compile(pattern_str)
+            pattern = sequence_pattern(prefix, suffix)
             
-            print(f"Sequence Pattern: {pattern_str}")
+            print(f"Sequence Pattern: {pattern.pattern}")
             
             # Override output filename for sequence: file001.cub -> file_all.vdb
             name_base = prefix
@@ -238,19 +383,21 @@ def load_cube(filepath, context, scale=1.0, naming_mode='MO_INDICES', import_seq
                 name_base += "_"
             output_vdb_name = os.path.join(base_dir, name_base + "all.vdb")
             
-            # Scan directory
-            all_files = os.listdir(base_dir)
-            
+            # Scan directory, cheap name/type checks before the regex
             found_sequences = []
-            for f in all_files:
-                m = pattern.match(f)
-                if m:
+            with os.scandir(base_dir or '.') as entries:
+                for entry in entries:
+                    if not entry.name.endswith(suffix) or not entry.is_file():
+                        continue
+                    m = pattern.match(entry.name)
+                    if not m:
+                        continue
                     num_str = m.group(1)
                     # "all volumes named yyy (if padding 0, remove it)"
                     # e.g. 001 -> 1
                     num_val = int(num_str)
                     grid_name = str(num_val) 
-                    found_sequences.append((os.path.join(base_dir, f), grid_name, num_val))
+                    found_sequences.append((os.path.join(base_dir, entry.name), grid_name, num_val))
             
             # Sort by number
             found_sequences.sort(key=lambda x: x[2])
@@ -268,24 +415,38 @@ def load_cube(filepath, context, scale=1.0, naming_mode='MO_INDICES', import_seq
     else:
         to_process = [(filepath, None)]
         
-    all_grids = []
+    return to_process, output_vdb_name
+
+def convert_sources(to_process, output_vdb_name, scale=1.0, naming_mode='MO_INDICES', half_float=False,
+                    tolerance=0.0, cancel_event=None):
+    """Write to_process into output_vdb_name and return its path. No bpy calls, safe off the main thread"""
+    start_time = time.time()
     
-    for path, custom_name in to_process:
-        try:
-            grids = read_vdb_grids(path, scale, naming_mode, custom_name)
-            all_grids.extend(grids)
-        except Exception as e:
-            print(f"Error reading {path}: {e}")
-            
-    if not all_grids:
-        raise RuntimeError("No grids loaded.")
+    # Settings that determine the .vdb contents, stored in its file metadata
+    settings = repr((source_stamps(to_process), scale, naming_mode, half_float, tolerance))
+    if vdb_up_to_date(output_vdb_name, settings):
+        print(f"{output_vdb_name} is up to date, skipping conversion")
+    else:
+        write_vdb(to_process, output_vdb_name, settings, scale, naming_mode, half_float, tolerance, cancel_event)
         
-    print(f"Writing {len(all_grids)} grids to {output_vdb_name}")
-    openvdb.write(output_vdb_name, grids=all_grids)
-    
+    print(f"Converted in {time.time() - start_time:.2f}s")
+    return output_vdb_name
+
+def convert_cube(filepath, scale=1.0, naming_mode='MO_INDICES', import_sequence=False, half_float=False,
+                 tolerance=0.0):
+    """Write the .vdb for a cube file (or its sequence) and return its path. No bpy calls, safe off the main thread"""
+    to_process, output_vdb_name = find_sources(filepath, import_sequence)
+    return convert_sources(to_process, output_vdb_name, scale, naming_mode, half_float, tolerance)
+
+def import_vdb(output_vdb_name):
     if os.path.exists(output_vdb_name):
         bpy.ops.object.volume_import(filepath=output_vdb_name, align='WORLD', location=(0,0,0))
-        
+
+def load_cube(filepath, context, scale=1.0, naming_mode='MO_INDICES', import_sequence=False, half_float=False,
+              tolerance=0.0):
+    start_time = time.time()
+    output_vdb_name = convert_cube(filepath, scale, naming_mode, import_sequence, half_float, tolerance)
+    import_vdb(output_vdb_name)
     print(f"Finished in {time.time() - start_time:.2f}s")
 
 
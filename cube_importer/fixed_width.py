@@ -0,0 +1,68 @@
+# Copyright (C) 2026  Usu171
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Parser for the fixed width grid values most writers (Gaussian cubegen, ORCA, Multiwfn, ...) print
+# as "%13.5E": " -1.23456E-05". Numpy only, no bpy, so it can be tested outside Blender.
+
+import numpy as np
+
+# (column, weight) of the mantissa digits in a 13 byte token
+FIXED_MANTISSA_DIGITS = ((2, 1e5), (4, 1e4), (5, 1e3), (6, 1e2), (7, 10.0), (8, 1.0))
+# Signed scale for code = exponent + 100 * (exponent < 0) + 200 * (value < 0)
+FIXED_SCALES = 10.0 ** (np.concatenate((np.arange(100), -np.arange(100))) - 5.0)
+FIXED_SCALES = np.concatenate((FIXED_SCALES, -FIXED_SCALES))
+
+def digit_column(tok, col):
+    """Digit values of one token column, None if any byte isn't a digit"""
+    digit = tok[:, col] - np.uint8(48)
+    return None if digit.max() > 9 else digit
+
+def parse_fixed_values(buf):
+    """Vectorized parse of "%13.5E" values from a uint8 array, None if buf isn't in that format"""
+    tok = buf[buf > 13] # Drop \r and \n, values then sit on a 13 byte grid
+    if tok.size % 13:
+        return None
+    if not tok.size:
+        return np.empty(0, dtype=np.float32)
+    tok = tok.reshape(-1, 13)
+    if not ((tok[:, 0] == 32) & (tok[:, 3] == 46) & (tok[:, 9] == 69)).all(): # " ", ".", "E"
+        return None
+    neg = tok[:, 1] == 45 # "-"
+    neg_exp = tok[:, 10] == 45
+    if not ((neg | (tok[:, 1] == 32)) & (neg_exp | (tok[:, 10] == 43))).all():
+        return None
+
+    # Accumulate column by column, the mantissa (< 2**24) is exact in float32
+    mantissa = np.zeros(len(tok), dtype=np.float32)
+    for col, weight in FIXED_MANTISSA_DIGITS:
+        digit = digit_column(tok, col)
+        if digit is None:
+            return None
+        mantissa += digit * np.float32(weight)
+    exp_tens = digit_column(tok, 11)
+    exp_ones = digit_column(tok, 12)
+    if exp_tens is None or exp_ones is None:
+        return None
+
+    code = exp_tens.astype(np.uint16)
+    code *= 10
+    code += exp_ones
+    code += neg_exp * np.uint16(100)
+    code += neg * np.uint16(200)
+    # Scale in float64 and round once, like strtod followed by a float32 cast
+    values = FIXED_SCALES.take(code)
+    values *= mantissa
+    with np.errstate(over='ignore'): # Beyond float32 range becomes inf, as with np.fromstring
+        return values.astype(np.float32)
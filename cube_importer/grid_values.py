@@ -0,0 +1,104 @@
+# Copyright (C) 2026  Usu171
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Reading the grid section of a cube file from an mmap. Numpy only, no bpy, so it can be tested outside Blender.
+
+import numpy as np
+
+from .fixed_width import parse_fixed_values
+
+# Bytes of grid data parsed per np.fromstring call
+CHUNK_SIZE = 16 * 1024 * 1024
+# Smaller for the fixed width parser, its temporaries are a few times the chunk size
+FIXED_CHUNK_SIZE = 4 * 1024 * 1024
+
+def skip_lines(mm, n_lines):
+    """Advance mm past n_lines lines using a vectorized newline scan"""
+    pos = mm.tell()
+    end = len(mm)
+    window = 80 * n_lines # Atom lines are well under 80 bytes
+    while n_lines > 0 and pos < end:
+        stop = min(pos + window, end)
+        buf = np.frombuffer(mm, dtype=np.uint8, count=stop - pos, offset=pos)
+        newlines = np.flatnonzero(buf == 0x0A)
+        del buf # Views into mm must be gone before it is closed
+        if newlines.size >= n_lines:
+            mm.seek(pos + int(newlines[n_lines - 1]) + 1)
+            return
+        if stop == end:
+            mm.seek(end)
+            return
+        window *= 2
+
+def read_grid_values(mm, offset, n_voxels, n_mo=1):
+    """Parse floats from mm[offset:] into a (n_mo, n_voxels) float32 array, in line aligned chunks"""
+    # MO major layout: out[m] is contiguous, the file interleaves MOs per voxel
+    out = np.zeros((n_mo, n_voxels), dtype=np.float32)
+    pending = np.empty(0, dtype=np.float32)
+    voxel = 0
+    n_values = 0
+    end = len(mm)
+    pos = offset
+    
+    # Use the fixed width parser if the first data line is in that format
+    nl = mm.find(b'\n', pos)
+    first_line = np.frombuffer(mm[pos:nl if nl >= 0 else end], dtype=np.uint8)
+    fixed = first_line.size > 0 and parse_fixed_values(first_line) is not None
+    chunk_size = FIXED_CHUNK_SIZE if fixed else CHUNK_SIZE
+    
+    while pos < end:
+        stop = end
+        if pos + chunk_size < end:
+            # Cut after the last newline of the chunk so no number is split
+            nl = mm.rfind(b'\n', pos, pos + chunk_size)
+            if nl < 0:
+                nl = mm.find(b'\n', pos + chunk_size)
+            if nl >= 0:
+                stop = nl + 1
+        
+        values = None
+        if fixed:
+            buf = np.frombuffer(mm, dtype=np.uint8, count=stop - pos, offset=pos)
+            values = parse_fixed_values(buf)
+            del buf # Views into mm must be gone before it is closed
+        if values is None:
+            # Text mode fromstring (sep given) is not deprecated and takes the bytes as is, no decode
+            values = np.fromstring(mm[pos:stop], sep=' ', dtype=np.float32)
+        n_values += values.size
+        pos = stop
+        if voxel >= n_voxels:
+            continue
+        
+        # Chunks don't end on voxel boundaries, finish the carried over voxel first
+        if pending.size:
+            need = n_mo - pending.size
+            if values.size < need:
+                pending = np.concatenate((pending, values))
+                continue
+            out[:pending.size, voxel] = pending
+            out[pending.size:, voxel] = values[:need]
+            values = values[need:]
+            voxel += 1
+            if voxel >= n_voxels:
+                continue
+        n = min(values.size // n_mo, n_voxels - voxel)
+        out[:, voxel:voxel + n] = values[:n * n_mo].reshape(n, n_mo).T
+        voxel += n
+        pending = values[n * n_mo:].copy()
+        
+    if pending.size and voxel < n_voxels:
+        out[:pending.size, voxel] = pending
+        
+    return out, n_values
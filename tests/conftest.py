@@ -0,0 +1,9 @@
+import pathlib
+import sys
+import types
+
+# Register cube_importer as a bare package so its numpy-only modules can be imported
+# without running __init__.py, which needs bpy
+package = types.ModuleType("cube_importer")
+package.__path__ = [str(pathlib.Path(__file__).parents[1] / "cube_importer")]
+sys.modules.setdefault("cube_importer", package)
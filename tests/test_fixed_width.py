@@ -0,0 +1,57 @@
+import numpy as np
+
+from cube_importer import fixed_width
+
+
+def cube_text(values, per_line=6, newline="\n"):
+    lines = ["".join(format(v, "13.5E") for v in values[i:i + per_line]) for i in range(0, len(values), per_line)]
+    return (newline.join(lines) + newline).encode()
+
+
+def parse(text):
+    return fixed_width.parse_fixed_values(np.frombuffer(text, dtype=np.uint8))
+
+
+def assert_same_as_fromstring(text):
+    values = parse(text)
+    expected = np.fromstring(text, sep=" ", dtype=np.float32)
+    assert values is not None
+    assert values.dtype == np.float32
+    # Bit for bit, so -0.0 and rounding differences are caught too
+    np.testing.assert_array_equal(values.view(np.uint32), expected.view(np.uint32))
+
+
+def test_matches_fromstring_on_random_values():
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal(60000) * 10.0 ** rng.integers(-40, 40, 60000)
+    values[::11] = 0.0
+    assert_same_as_fromstring(cube_text(values))
+
+
+def test_edge_values():
+    values = [-0.0, 0.0, 9.99999e99, -9.99999e99, 1e-99, -1.23456e-99, 1.0, -1.0, 3.4e38, 1.5e-45]
+    text = cube_text(values)
+    assert b"-0.00000E+00" in text and b"E+99" in text and b"E-99" in text
+    assert_same_as_fromstring(text)
+
+
+def test_crlf_and_short_lines():
+    rng = np.random.default_rng(1)
+    values = rng.standard_normal(1000)
+    # Cube blocks end with short lines when n3 * n_mo isn't a multiple of 6
+    assert_same_as_fromstring(cube_text(values, per_line=5, newline="\r\n"))
+
+
+def test_empty():
+    assert parse(b"").size == 0
+    assert parse(b"\n\r\n").size == 0
+
+
+def test_rejects_other_formats():
+    assert parse(b"  1.00000E+100\n") is None
+    assert parse(b"  1.00000e-05\n") is None
+    assert parse(b"   1.0000E-05\n") is None
+    assert parse(b"  1.00000E-05 \n") is None
+    assert parse(b"  1.0000xE-05\n") is None
+    assert parse(b" +1.00000E-05\n") is None
+    assert parse(format(1.5, "16.8E").encode()) is None
@@ -0,0 +1,123 @@
+import mmap
+
+import numpy as np
+import pytest
+
+from cube_importer import grid_values
+
+HEADER = b"header line\n"
+
+
+def format_values(values, block, fmt, newline="\n"):
+    # Cube layout: each (i, j) column of block = n3 * n_mo values, 6 per line
+    lines = []
+    for start in range(0, len(values), block):
+        column = values[start:start + block]
+        lines += ["".join(fmt % v for v in column[i:i + 6]) for i in range(0, len(column), 6)]
+    return (newline.join(lines) + newline).encode()
+
+
+def random_values(count, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.standard_normal(count) * 10.0 ** rng.integers(-8, 3, count)
+    values[::5] = 0.0
+    return values
+
+
+def baseline(text, shape, n_mo):
+    # What read_vdb_grids did before the chunked parser
+    data = np.fromstring(text.decode(), sep=" ")
+    expected_len = np.prod(shape) * n_mo
+    if data.size > expected_len:
+        data = data[:expected_len]
+    else:
+        data = np.pad(data, (0, expected_len - data.size))
+    data = data.reshape((*shape, n_mo))
+    return np.stack([data[:, :, :, m].astype(np.float32) for m in range(n_mo)])
+
+
+def read(tmp_path, text, shape, n_mo):
+    path = tmp_path / "grid.cub"
+    path.write_bytes(HEADER + text)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        out, n_values = grid_values.read_grid_values(mm, len(HEADER), int(np.prod(shape)), n_mo)
+    assert out.dtype == np.float32
+    assert out.shape == (n_mo, np.prod(shape))
+    assert all(out[m].flags.c_contiguous for m in range(n_mo))
+    return out.reshape((n_mo, *shape)), n_values
+
+
+def assert_bits_equal(a, b):
+    np.testing.assert_array_equal(a.view(np.uint32), b.view(np.uint32))
+
+
+@pytest.fixture(params=[None, 1, 29, 100], ids=["default", "chunk1", "chunk29", "chunk100"])
+def chunk_size(request, monkeypatch):
+    # Tiny chunks cut inside lines and voxels, exercising the carried over values
+    if request.param is not None:
+        monkeypatch.setattr(grid_values, "CHUNK_SIZE", request.param)
+        monkeypatch.setattr(grid_values, "FIXED_CHUNK_SIZE", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("n_mo", [1, 3, 7])
+@pytest.mark.parametrize("fmt", ["%13.5E", "%15.6e"], ids=["fixed", "general"])
+@pytest.mark.parametrize("newline", ["\n", "\r\n"], ids=["lf", "crlf"])
+def test_matches_baseline(tmp_path, chunk_size, n_mo, fmt, newline):
+    shape = (3, 4, 5)
+    values = random_values(np.prod(shape) * n_mo)
+    text = format_values(values, shape[2] * n_mo, fmt, newline)
+    out, n_values = read(tmp_path, text, shape, n_mo)
+    assert n_values == values.size
+    assert_bits_equal(out, baseline(text, shape, n_mo))
+
+
+@pytest.mark.parametrize("n_mo", [1, 4])
+@pytest.mark.parametrize("missing", [1, 5, 23])
+def test_short_file_is_zero_padded(tmp_path, chunk_size, n_mo, missing):
+    shape = (2, 3, 4)
+    values = random_values(np.prod(shape) * n_mo, seed=1)[:-missing]
+    text = format_values(values, shape[2] * n_mo, "%13.5E")
+    out, n_values = read(tmp_path, text, shape, n_mo)
+    assert n_values == values.size
+    assert_bits_equal(out, baseline(text, shape, n_mo))
+
+
+@pytest.mark.parametrize("n_mo", [1, 4])
+def test_long_file_is_truncated(tmp_path, chunk_size, n_mo):
+    shape = (2, 3, 4)
+    values = random_values(np.prod(shape) * n_mo + 9, seed=2)
+    text = format_values(values, shape[2] * n_mo, "%13.5E")
+    out, n_values = read(tmp_path, text, shape, n_mo)
+    assert n_values == values.size
+    assert_bits_equal(out, baseline(text, shape, n_mo))
+
+
+def test_mixed_formats_fall_back_per_chunk(tmp_path, chunk_size):
+    # Fixed width on the first line, a value the fixed parser rejects further down
+    shape = (2, 2, 6)
+    values = random_values(np.prod(shape), seed=3)
+    text = format_values(values, shape[2], "%13.5E") + b"  1.00000E+100\n"
+    out, n_values = read(tmp_path, text, shape, 1)
+    assert n_values == values.size + 1
+    assert_bits_equal(out, baseline(text, shape, 1))
+
+
+def skip(tmp_path, text, n_lines):
+    path = tmp_path / "lines.txt"
+    path.write_bytes(text)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        grid_values.skip_lines(mm, n_lines)
+        return mm.tell()
+
+
+@pytest.mark.parametrize("n_lines", [0, 1, 2, 5, 10, 11, 50])
+@pytest.mark.parametrize("length", [3, 79, 300], ids=["short", "typical", "long"])
+def test_skip_lines_matches_readline(tmp_path, n_lines, length):
+    # Lines longer than 80 bytes make skip_lines grow its scan window
+    text = b"".join(b"x" * length + b"\r\n" for _ in range(10)) + b"tail"
+    expected = 0
+    lines = text.splitlines(keepends=True)
+    for line in lines[:n_lines]:
+        expected += len(line)
+    assert skip(tmp_path, text, n_lines) == expected